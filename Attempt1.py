@@ -1,8 +1,12 @@
 #------------------------
-#  NOTE THAT THIS ATTEMPT WAS A FAILURE
+#  ATTEMPT 1 (REVISITED)
 #------------------------
-#  I gave up before going to completion when I realized how long it was taking just
-#  to generate the Base-N palindromes... and the fact that I was going to run out of symbols for the digits
+#  The original version of this attempt was a failure.  I gave up before going to
+#  completion when I realized how long it was taking just to generate the Base-N
+#  palindromes... and the fact that I was going to run out of symbols for the digits
+#
+#  This version turns the search around: it generates the binary palindromes
+#  (of which there are far fewer) and tests each of them in base N.
 #------------------------
 
 #------------------------
@@ -29,22 +33,216 @@
 #------------------------
 # Design Notes
 #------------------------
+# A "number" is a python int
+#   python's arbitrary precision ints do all of their arithmetic in C,
+#     which is far faster than anything we can do digit by digit in python
+#   does not have an implicit base
 # A "digit" is an integer value in the range [0,N)
-# each is represented by the normal symbols: 0, 1, ..., 9, A, B, ..., C
-# if N needs to go above 36, we will need to extend this list
-# A "number" is a big-endian list of digits
-# does not have an implicit base
-# is only valid if the largest digit is less than the base
-# "bits" is a list of binary digits
+#   each is represented by the normal symbols: 0, 1, ..., 9, A, B, ..., Z
+#   above base 36, we run out of symbols and show each digit as (d) instead
+# "digits" is a big-endian list of digits
+#   only used at the boundaries (i.e. for display)
+# "bits" is a string of binary digits
+
+import array
+import bisect
+import hashlib
+import math
+import multiprocessing
+import pathlib
+import pickle
+import sys
+
+# numba is optional... without it, the "compiled" functions below are
+#   simply run as plain python
+try:
+    from numba import njit
+    _have_numba = True
+except ImportError:
+    _have_numba = False
+    def njit(*args,**kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
 
+# the compiled search (see _bentwinter.pyx) is also optional... it must be
+#   built with cython before it can be used
+try:
+    import _bentwinter
+except ImportError:
+    _bentwinter = None
 
-_digit_map = {i:d for i,d in enumerate("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ")}
+# numpy is optional too... without it, candidates are tested one at a time
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the symbol for each digit is found by indexing into this string
+#   (cheaper than hashing the digit into a dict)
+_digit_str = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
 def number_to_string(n):
-    # n is a number
+    # n is a list of digits
     # returns a string representing the number in human readable form
     # this function is base agnostic
-    return "".join((_digit_map[d] for d in n))
+    return "".join([_digit_str[d] for d in n])
+
+@njit(cache=True)
+def _search(cands,N,s):
+    # cands is a sequence of numbers in increasing order
+    #   (which must fit in 64 bits if compiled)
+    # s is log2(N) if N is a power of 2, otherwise 0
+    # returns the first of them that is a palindrome in base N
+    #   (or 0 if there isn't one)
+    #
+    # This is the whole per-candidate search in a single loop with no
+    #   function calls, so that it can be compiled with numba as one piece.
+    #
+    # Successive candidates are close together, so they usually share
+    #   the same leading digits.  If n has M digits, its last M//2 digits
+    #   must be its leading M//2 digits reversed for it to be a palindrome.
+    #   The leading digits (and their reverse) are only worked out again
+    #   once n moves past the range of numbers that share them.  Until
+    #   then, a single modulus rejects almost all of the candidates
+    #   without doing the full palindrome test.
+    #
+    # The full test doesn't build a list of digits.  Instead, we peel
+    #   digits off the bottom of n and use them to build the number with
+    #   its digits reversed.  n is a palindrome if and only if it is equal
+    #   to its reverse.  If N is a power of 2, each digit is simply the
+    #   next s bits, so we can shift and mask rather than multiply and
+    #   divide.
+    mask = N - 1
+    hi = 0
+    mod = 1
+    tail = 0
+    for n in cands:
+        if n >= hi:
+            # number of digits (M) in n
+            M = 1
+            p = N
+            while p <= n:
+                p *= N
+                M += 1
+            # the leading M//2 digits and their reverse
+            mod = N**(M//2)
+            p //= mod
+            lead = n // p
+            hi = (lead+1) * p
+            tail = 0
+            for _ in range(M//2):
+                lead,d = divmod(lead,N)
+                tail = tail*N + d
+        if n % mod == tail:
+            r = 0
+            m = n
+            if s:
+                while m > 0:
+                    r = (r << s) | (m & mask)
+                    m = m >> s
+            else:
+                while m > 0:
+                    r = r*N + m % N
+                    m = m // N
+            if r == n:
+                return n
+    return 0
+
+# the search as plain python (for numbers too big for 64 bits)
+_search_py = getattr(_search, "py_func", _search)
+
+def _from_digits(digits,N):
+    # digits is a base N number (big-endian)
+    # returns a number
+    #
+    # Horner's rule (n = n*N + d for each digit) is quadratic in the number
+    #   of digits as n keeps growing.  Instead, split the digits in two
+    #   with the lower part having 2^k digits and combine the two halves as
+    #     high * N^(2^k) + low
+    #   recursing on each half.  The powers N^(2^k) are found by repeatedly
+    #   squaring N.  Short runs of digits are still done with Horner's rule.
+    pows = [N]
+    while (1 << len(pows)) < len(digits):
+        pows.append(pows[-1]*pows[-1])
+
+    def convert(lo,hi,k):
+        if hi - lo <= 32:
+            n = 0
+            for d in digits[lo:hi]:
+                n = n*N + d
+            return n
+        while (1 << k) >= hi - lo:
+            k -= 1
+        mid = hi - (1 << k)
+        return convert(lo,mid,k) * pows[k] + convert(mid,hi,k)
+
+    return convert(0,len(digits),len(pows)-1)
+
+def _reverse64(x):
+    # x is a 64 bit word
+    # returns x with the order of its 64 bits reversed
+    #
+    # This is the classic SWAR (SIMD within a register) bit reversal:
+    #   swap adjacent bits, then adjacent pairs of bits, then nibbles,
+    #   bytes, 16 bit halves, and finally 32 bit halves.  No loops and
+    #   no branches.
+    x = ((x >>  1) & 0x5555555555555555) | ((x & 0x5555555555555555) <<  1)
+    x = ((x >>  2) & 0x3333333333333333) | ((x & 0x3333333333333333) <<  2)
+    x = ((x >>  4) & 0x0F0F0F0F0F0F0F0F) | ((x & 0x0F0F0F0F0F0F0F0F) <<  4)
+    x = ((x >>  8) & 0x00FF00FF00FF00FF) | ((x & 0x00FF00FF00FF00FF) <<  8)
+    x = ((x >> 16) & 0x0000FFFF0000FFFF) | ((x & 0x0000FFFF0000FFFF) << 16)
+    x = ((x >> 32) & 0x00000000FFFFFFFF) | ((x & 0x00000000FFFFFFFF) << 32)
+    return x
+
+def _reverse_bits(x,nbits):
+    # x is a number with no more than nbits bits
+    # returns x with the order of its lowest nbits bits reversed
+    #
+    # x is reversed one 64 bit word at a time, with the lowest word
+    #   ending up as the highest.  The result is then shifted down to
+    #   drop the padding that was above bit nbits.
+    r = 0
+    nwords = (nbits+63)//64
+    for _ in range(nwords):
+        r = (r << 64) | _reverse64(x & 0xFFFFFFFFFFFFFFFF)
+        x >>= 64
+    return r >> (64*nwords - nbits)
+
+# Reversing the bits of each candidate half-palindrome is the most
+#   frequently performed operation in the search.  From python, a single
+#   lookup in a flat list is much cheaper than the SWAR arithmetic (or a
+#   dict lookup), so we precompute the reversal of every 16 bit value.
+_rev16 = [_reverse64(x) >> 48 for x in range(1<<16)]
+
+# Whether or not a number is a binary palindrome has nothing to do with N,
+#   so rather than every Base generating them on its own, the (odd) binary
+#   palindromes are kept in a single ascending table shared by all bases.
+#   The table is extended one bit length at a time as needed.
+_bin_pals = list()
+
+def _extend_bin_pals():
+    # appends all of the binary palindromes with one more bit than the
+    #   largest currently in _bin_pals
+    #
+    # For a palindrome of B bits, the upper half (h) has (B+1)//2 bits
+    #   and must start with a 1 (which also makes the palindrome odd).
+    #   The lower half (B//2 bits) is simply h reversed (excluding the
+    #   center bit if B is odd).  Iterating h in increasing order
+    #   produces the B bit palindromes in increasing order.
+    B = _bin_pals[-1].bit_length() + 1 if _bin_pals else 1
+    k = (B+1)//2
+    odd = B % 2
+    lo = B//2
+    if lo <= 16:
+        rev = _rev16
+        shift = 16 - lo
+        _bin_pals.extend((h << lo) | (rev[h >> odd] >> shift)
+                         for h in range(1<<(k-1), 1<<k))
+    else:
+        _bin_pals.extend((h << lo) | _reverse_bits(h >> odd, lo)
+                         for h in range(1<<(k-1), 1<<k))
 
 class Base:
     # provides the base specific arithmetic functions as needed
@@ -53,77 +251,47 @@ class Base:
         self.N = N
         self.odd = N % 2
 
-        # As division and modulus is expensive from a runtime POV and as we
-        #   will only ever need to divide by 2 (for conversion to bits), we
-        #   are going to precompute 1 or 2 digits cases we will encounter.
-        # Specifically, we will precompute quotient and remainder for all
-        #   number in the range 0 to 2N-1:
-        #     0 to  N-1: [0,d] where d is in range 0 to N-1
-        #     N to 2N-1: [1,d] where d is in range 0 to N-1
-        # Values will be stored as a map from n to (q,r) where:
-        #   n is a 2 digit sequence of the form (0,d) or (1,d)
-        #   q is the quotient from dividing by 2 (will be in the range 0 to N-1)
-        #   r is the remainder from dividing by 2 (will be either 0 or 1)
-        self._qr2 = {divmod(n,N):divmod(n,2) for n in range(2*N)}
-
-        # @@@ don't delete this yet... i might come back to it
-        # In order to preallocate the array that will store bits when
-        #   converting to binary, it is useful to have an upper bound on
-        #   the number of bits to expect for an M digit base-N number.
-        #     - the value of the number will be less than N^M
-        #     - we need, therefore, enough bits (B) to represent N^M
-        #          2^(B-1) >= N^M
-        #          (B-1) log(2) >= M log(N)
-        #          B >= 1 + M log(N)/log(2)
-        #          B = ceil(1 + M log2(N))
-        # self.log2N = np.log(N)/np.log(2)
+        # _search builds a reversed copy of its input which will
+        #   have the same number of digits.  It is less than N times the
+        #   input, so this is the largest input that won't overflow 64 bits.
+        self._max_compiled = (1<<63) // N
+
+        # In order to preallocate the array that will store digits when
+        #   converting from an int, it is useful to have an upper bound on
+        #   the number of digits (M) to expect for a B bit number.
+        #     - the value of the number will be less than 2^B
+        #     - the number of digits is floor(log_N(n)) + 1
+        #          M <= 1 + B log(2)/log(N)
+        #          M <= 1 + B/log2(N)
+        #     - we add one more for safety against floating point roundoff
+        self.log2N = math.log2(N)
+
+        # If N is a power of 2, the digits are just groups of bits, which
+        #   allows for a cheaper palindrome test (see _search)
+        self.shift = N.bit_length() - 1 if N & (N-1) == 0 else 0
 
     def __str__(self):
         return f"Base({self.N})"
 
-    def divmod2(self,n):
-        # n is a number
-        # returns Q,R where:
-        #   Q is the quotient (a base N number) when n is divided by 2
-        #   R is the remainder (0 or 1) when n is divided by 2
-        assert n[0] > 0, "should never be called with a leading 0: " + number_to_string(n)
-
-        if n[0] == 1:
-            # first digit is not divisible by 2, move on to dividing first 2 digits
-            R = 1
-            n = n[1:]
-        else:
-            # first digit is divisible by 2
-            R = 0
-
-        Q = list()
-        for i,d in enumerate(n):
-            q,R = self._qr2[(R,d)]
-            Q.append(q)
-
-        return Q,R
-
-    def divmod10(self,n):
+    def _digit_array(self,n):
         # n is a number
-        # returns Q,R where:
-        #   Q is the quotient (a base N number) when n is divided by 10
-        #   R is the remainder (0 or 1) when n is divided by 10
+        # returns a (big-endian) array of base N digits
         #
-        # This function is essentially identical to divmod2 except that
-        #   where divmod2 is called many many times while trying to find P[N],
-        #   divmod10 will only be called once P[N] has been found and
-        #   we need to convert it to a decimal value.  There is no need
-        #   to precompute the q,r pairs for division by 10
-        assert n[0] > 0, "should never be called with a leading 0: " + number_to_string(n)
-
-        R = 0
-        Q = list()
-        for i,d in enumerate(n):
-            q,R = divmod(R*self.N + d, 10)
-            if q or Q:  # avoids leading zeros
-                Q.append(q)
-        return Q,R
+        # The array is preallocated and filled from the end, so there is
+        #   no need to reverse it.
+        M = 2 + int(n.bit_length() / self.log2N)
+        buf = array.array('L', [0]) * M
+        i = M
+        while n:
+            n,d = divmod(n,self.N)
+            i -= 1
+            buf[i] = d
+        return buf[i:]
 
+    def digits(self,n):
+        # n is a number
+        # returns the big-endian list of base N digits
+        return self._digit_array(n).tolist()
 
     def bits(self,n):
         # n is a number
@@ -132,115 +300,187 @@ class Base:
 
         # quick check... if n is an even number, the binary cannot be a palindrome
         #   as this would require it to start with a leading 0
-        #   for odd bases: number is odd if sum of all digits is odd
-        #   for even bases: number is odd if final digit is odd
-        parity = sum(n)  if self.odd else n[-1]
-        if parity % 2 == 0:
+        if n % 2 == 0:
             return None
 
-        # create the (little-endian) list of binary digits by continuously
-        #  dividing by 2 and recording the remainders
-        bits = list()
-        while n:
-            n,r = self.divmod2(n)
-            bits.append(r)
-
-        # check bits for palindrome
-        #   we don't care that it's little-endian
-        nbits = len(bits)
-        for i in range(nbits//2):
-            if bits[i] != bits[nbits-1-i]:
-                return None
-                
-        # we have a palindromic binary number, return it
-        #   no need to convert to big-endian as it's a palindrome
-        return bits
+        # n is a binary palindrome if and only if it is equal to itself
+        #   with its bits reversed
+        if _reverse_bits(n,n.bit_length()) != n:
+            return None
+
+        return bin(n)[2:]
 
     def decimal(self,n):
         # n is a number
         # returns the decimal number as a string
+        #   (as of python 3.12, str uses a subquadratic algorithm for big ints)
+        return str(n)
 
-        # create the (little-endian) list of decimal digits by continuously
-        #  dividing by 10 and recording the remainders
-        decimal = list()
-        while n:
-            n,r = self.divmod10(n)
-            decimal.append(r)
-        # flip to big-endian and convert to number string
-        decimal.reverse()
-        decimal = number_to_string(decimal)
-        return decimal
-
-    def palindromes(self,length):
-        # generator function for returning all of the palindromes
-        #   of given length with constraint that minimum is 2N
-
-        # determine if length is odd (we'll need this soon)
-        odd = length % 2
-        
-        # determine number of digits in half of the palindrome
-        #   odd length palindromes have an "extra" digit in the center
-        m = (1+length)//2 if odd else length//2
-
-        # if length is 2, then smallest half-palindrome is 2 (to avoid 11, which is < 2N)
-        # otherwise, the smallest half-palindrome is 1 with m-1 following zeros
-        n = [2] if length == 2 else [1]+[0 for _ in range(m-1)]
-
-        while n[0] < self.N:
-            # generate palindrome
-            if odd:
-                yield n + list(reversed(n[:-1]))
-            else:
-                yield n + list(reversed(n))
-            # advance to next
-            for i in range(m-1,-1,-1):
-                n[i] = 1 + n[i]
-                if n[i] < self.N:
+    def odd_palindrome_ranges(self):
+        # generator function for returning the ranges of values [lo,hi)
+        #   (in increasing order) which may contain odd base N palindromes
+        #   (hi is None if the range has no upper limit)
+        #
+        # Only odd palindromes can be binary palindromes.  For odd N, a
+        #   number is odd if the sum of its digits is odd.  Every digit of
+        #   an even length palindrome appears twice, so they are always
+        #   even, which rules out every number with an even number of
+        #   digits.  There is no point in testing any of the binary
+        #   palindromes in those ranges.
+        #
+        # (For even N, the leading digit must also be odd, but that rules
+        #   out lots of small ranges which _search already rejects cheaply
+        #   on its own.)
+        if not self.odd:
+            yield (1, None)
+            return
+        N = self.N
+        p = 1
+        while True:
+            # p is N^(length-1) for the next odd length
+            yield (p, N*p)
+            p *= N*N
+
+    def binary_palindrome_batches(self,size):
+        # generator function for returning the odd binary palindromes
+        #   exceeding 2N in increasing numeric order (as python ints)
+        #   as lists of (up to) size at a time
+        #   (skipping any that cannot possibly be palindromes in base N)
+        #
+        # For N > 2, there are far fewer binary palindromes than base-N
+        #   palindromes in any given range of values.  It is therefore much
+        #   cheaper to walk the binary palindromes and test each of them
+        #   for being a palindrome in base N than the other way around.
+        #
+        # The palindromes are taken from the shared table (_bin_pals),
+        #   extending it whenever we run off the end.  Each range from
+        #   odd_palindrome_ranges is located in the table by bisection so
+        #   that everything between ranges is skipped over without being
+        #   looked at.
+        two_N = 2*self.N
+        for lo,hi in self.odd_palindrome_ranges():
+            if hi is not None and hi <= two_N:
+                continue
+            lo = max(lo, two_N+1)
+            while not _bin_pals or _bin_pals[-1] < lo:
+                _extend_bin_pals()
+            i = bisect.bisect_left(_bin_pals, lo)
+            while True:
+                while i >= len(_bin_pals):
+                    _extend_bin_pals()
+                if hi is None:
+                    j = min(i+size, len(_bin_pals))
+                else:
+                    j = min(i+size, bisect.bisect_left(_bin_pals, hi, i))
+                if j == i:
                     break
-                if i:
-                    n[i] = 0
+                yield _bin_pals[i:j]
+                i = j
+
+    def palindrome_mask(self,batch):
+        # batch is a list of (64 bit) numbers in increasing order
+        # returns a numpy array of bools indicating which are palindromes
+        #   in base N
+        #
+        # This is the full palindrome test from _search applied to the
+        #   whole batch at once, so the loop over the candidates happens
+        #   inside numpy (in C).  Numbers with fewer digits simply stop
+        #   contributing to their reversed value once they run out of digits.
+        N = self.N
+        s = self.shift
+        n = np.array(batch, dtype=np.int64)
+        r = np.zeros_like(n)
+        m = n.copy()
+        for _ in range(2 + int(batch[-1].bit_length() / self.log2N)):
+            if s:
+                r = np.where(m > 0, (r << s) | (m & (N-1)), r)
+                m >>= s
+            else:
+                r = np.where(m > 0, r*N + m % N, r)
+                m //= N
+        return r == n
 
     def first_palindrome(self):
-        for p_len in range(2,30):
-            for n in self.palindromes(p_len):
-                bits = self.bits(n)
-                if bits:
-                    return (self.N, n, bits, self.decimal(n) )
+        N = self.N
+        s = self.shift
+        if _bentwinter is not None:
+            # the compiled search gives up if P(N) won't fit in 64 bits
+            n = _bentwinter.find_first(N)
+            if n is not None:
+                return (N, self.digits(n), self.bits(n), self.decimal(n) )
+
+        for batch in self.binary_palindrome_batches(1024):
+            if batch[-1] >= self._max_compiled:
+                n = _search_py(batch,N,s)
+            elif _have_numba:
+                n = _search(np.array(batch, dtype=np.int64), N, s)
+            elif np is not None:
+                hits = np.flatnonzero(self.palindrome_mask(batch))
+                n = batch[hits[0]] if hits.size else 0
+            else:
+                n = _search(batch,N,s)
+            if n:
+                return (N, self.digits(n), self.bits(n), self.decimal(n) )
 
     def from_binary(self,bits):
         # (only needed for dev/test purpose)
         # bits is a binary number (big-endian)
-        # returns a number in base N
-        n = [0]
-        for b in bits:
-            n = [2*d for d in n]
-            n[0] = n[0] + b
-            C = 0
-            for i,d in enumerate(n):
-                C,d = divmod(d+C,self.N)
-                n[i] = d
-            if C:
-                n.append(C)
-        n.reverse()
-        return n
+        # returns a number
+        return int("".join(str(b) for b in bits), 2)
 
     def from_decimal(self,decimal):
         # (only needed for dev/test purpose)
         # decimal is a base 10 number (big-endian)
-        # returns a number in base N
-        n = [0]
-        for d in decimal:
-            n = [10*t for t in n]
-            n[0] = n[0] + d
-            C = 0
-            for i,t in enumerate(n):
-                C,t = divmod(t+C,self.N)
-                n[i] = t
-            while C:
-                C,t = divmod(C,self.N)
-                n.append(t)
-        n.reverse()
-        return n
-
-Pn = [Base(n).first_palindrome() for n in range(3,1000)]
-print(Pn)
\ No newline at end of file
+        # returns a number
+        return _from_digits(decimal,10)
+
+    def from_digits(self,digits):
+        # (only needed for dev/test purpose)
+        # digits is a base N number (big-endian)
+        # returns a number
+        return _from_digits(digits,self.N)
+
+def _solve(N):
+    # (module level so that it can be handed to the worker processes)
+    return Base(N).first_palindrome()
+
+if __name__ == "__main__":
+    # P(N) for each N is completely independent of all the others, so we
+    #   can spread them across all of the cores.  The larger N take longer
+    #   to solve, so hand them out one at a time to balance the load.
+    # Results are cached (keyed by N) so that re-runs only need to solve
+    #   any N that haven't been solved before.
+    # The cached results are only good for the code that produced them,
+    #   so the cache also records a hash of this file (and of the compiled
+    #   search, if there is one) and is thrown away if either has changed
+    #   since.  Running with --fresh throws it away regardless.
+    source = pathlib.Path(__file__)
+    cache = source.with_name("pn.pkl")
+    version = hashlib.sha256(source.read_bytes())
+    if _bentwinter is not None:
+        version.update(pathlib.Path(_bentwinter.__file__).read_bytes())
+    version = version.hexdigest()
+    solved = dict()
+    if cache.exists() and "--fresh" not in sys.argv:
+        cached_version, cached = pickle.loads(cache.read_bytes())
+        if cached_version == version:
+            solved = cached
+
+    todo = [n for n in range(3,1000) if n not in solved]
+    with multiprocessing.Pool() as pool:
+        for p in pool.map(_solve, todo, chunksize=1):
+            solved[p[0]] = p
+    cache.write_bytes(pickle.dumps((version, solved)))
+
+    # The sequence only includes P(N) if it is larger than all of the
+    #   P(N) before it.  We run out of symbols for the digits above base 36,
+    #   so the digits of larger bases are each shown in parentheses.
+    best = 0
+    for N,digits,bits,decimal in (solved[n] for n in range(3,1000)):
+        if int(decimal) > best:
+            best = int(decimal)
+            if N <= len(_digit_str):
+                digits = number_to_string(digits)
+            else:
+                digits = "".join(f"({d})" for d in digits)
+            print(f"{N}: {best:,}: {digits} {bits}")
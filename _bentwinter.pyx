@@ -0,0 +1,71 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+#------------------------
+#  Compiled version of the search in Attempt1.py
+#------------------------
+#  Build in place (next to Attempt1.py) with:
+#     cythonize -3 --inplace _bentwinter.pyx
+#
+#  Attempt1.py uses this if it can be imported and falls back to python
+#  if it cannot.  Everything here is done in unsigned 64 bit arithmetic,
+#  so there are no python objects (and no interpreter) in the inner loops.
+#------------------------
+
+from libc.stdint cimport uint64_t
+
+cdef uint64_t _MAX = 0xFFFFFFFFFFFFFFFFULL
+
+cdef inline uint64_t reverse64(uint64_t x) nogil:
+    # returns x with the order of its 64 bits reversed (SWAR, see Attempt1.py)
+    x = ((x >>  1) & 0x5555555555555555ULL) | ((x & 0x5555555555555555ULL) <<  1)
+    x = ((x >>  2) & 0x3333333333333333ULL) | ((x & 0x3333333333333333ULL) <<  2)
+    x = ((x >>  4) & 0x0F0F0F0F0F0F0F0FULL) | ((x & 0x0F0F0F0F0F0F0F0FULL) <<  4)
+    x = ((x >>  8) & 0x00FF00FF00FF00FFULL) | ((x & 0x00FF00FF00FF00FFULL) <<  8)
+    x = ((x >> 16) & 0x0000FFFF0000FFFFULL) | ((x & 0x0000FFFF0000FFFFULL) << 16)
+    x = ((x >> 32) & 0x00000000FFFFFFFFULL) | ((x & 0x00000000FFFFFFFFULL) << 32)
+    return x
+
+cdef inline bint is_palindrome(uint64_t n, uint64_t N) nogil:
+    # returns True if n is a palindrome in base N
+    #   (n must be less than 2^64 / N so that its reverse doesn't overflow)
+    cdef uint64_t r = 0
+    cdef uint64_t m = n
+    while m:
+        r = r*N + m % N
+        m = m // N
+    return r == n
+
+cdef uint64_t _search(uint64_t N) nogil:
+    # returns the smallest odd binary palindrome exceeding 2N which is
+    #   also a palindrome in base N (or 0 if it would not fit in 64 bits)
+    #
+    # The binary palindromes are generated exactly as in _extend_bin_pals
+    #   in Attempt1.py: the upper half h of a B bit palindrome is mirrored
+    #   to form its lower half.
+    cdef uint64_t limit = _MAX // N
+    cdef uint64_t h, v, two_N = 2*N
+    cdef int B = 1, k, odd, lo
+    while (two_N >> B) != 0:
+        B += 1
+    while B < 64:
+        k = (B+1)//2
+        odd = B % 2
+        lo = B//2
+        h = (<uint64_t>1) << (k-1)
+        while h < (<uint64_t>1) << k:
+            v = (h << lo) | ((reverse64(h >> odd) >> (64-lo)) if lo else 0)
+            if v >= limit:
+                return 0
+            if v > two_N and is_palindrome(v,N):
+                return v
+            h += 1
+        B += 1
+    return 0
+
+def find_first(N):
+    # N is the base
+    # returns P(N) as a number (see Base.first_palindrome in Attempt1.py)
+    #   or None if P(N) will not fit in 64 bits
+    cdef uint64_t v = _search(N)
+    if v == 0:
+        return None
+    return v